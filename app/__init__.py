@@ -1,2 +1,3 @@
 # TradeLab Backend Application
 
+__version__ = "1.0.2"
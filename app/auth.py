@@ -1,12 +1,14 @@
 """Authentication utilities for Supabase JWT validation."""
 
+import hashlib
 import logging
+import time
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import create_client, Client
 from jose import JWTError, jwt
 from app.config import settings
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import requests
 
 # Set up logging
@@ -30,6 +32,11 @@ security = HTTPBearer()
 # Cache for JWT secrets
 _jwt_secret_cache = {}
 
+# Verified token payloads keyed by a digest of the token (never the raw token),
+# so repeat requests with the same bearer token skip jwt.decode
+JWT_CACHE_MAX_ENTRIES = 10_000
+_verified_token_cache: Dict[bytes, Tuple[float, dict]] = {}
+
 
 def get_jwt_secret() -> str:
     """Get the JWT secret for token verification."""
@@ -44,8 +51,38 @@ def get_jwt_secret() -> str:
     raise ValueError("JWT secret not configured. Please set SUPABASE_JWT_SECRET environment variable.")
 
 
+def _cached_token_payload(cache_key: bytes) -> Optional[dict]:
+    """Return the cached payload for cache_key if it has not expired."""
+    entry = _verified_token_cache.get(cache_key)
+    if entry is not None and time.time() < entry[0]:
+        return entry[1]
+    return None
+
+
+def _cache_token_payload(cache_key: bytes, payload: dict) -> None:
+    """Cache a verified payload for AUTH_CACHE_TTL seconds, never past the token's exp."""
+    expires_at = time.time() + settings.auth_cache_ttl
+    if payload.get("exp"):
+        expires_at = min(expires_at, float(payload["exp"]))
+    if len(_verified_token_cache) >= JWT_CACHE_MAX_ENTRIES:
+        now = time.time()
+        for key, (entry_expires_at, _) in list(_verified_token_cache.items()):
+            if entry_expires_at <= now:
+                _verified_token_cache.pop(key, None)
+        if len(_verified_token_cache) >= JWT_CACHE_MAX_ENTRIES:
+            _verified_token_cache.clear()
+    _verified_token_cache[cache_key] = (expires_at, payload)
+
+
 def verify_jwt_token(token: str) -> Optional[dict]:
     """Verify JWT token and return payload with proper security."""
+    cache_key = None
+    if settings.auth_cache_ttl > 0 and token:
+        cache_key = hashlib.sha256(token.encode()).digest()[:16]
+        payload = _cached_token_payload(cache_key)
+        if payload is not None:
+            return payload
+    
     try:
         if not token or len(token.split('.')) != 3:
             logger.warning("Invalid token format")
@@ -82,6 +119,8 @@ def verify_jwt_token(token: str) -> Optional[dict]:
                 return None
             
             logger.debug(f"Token verified successfully for user: {payload.get('email', 'N/A')}")
+            if cache_key is not None:
+                _cache_token_payload(cache_key, payload)
             return payload
             
         except JWTError as e:
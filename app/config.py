@@ -48,6 +48,7 @@ class Settings(BaseSettings):
     secret_key: str = "your-super-secret-key-change-in-production"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    auth_cache_ttl: int = 30  # seconds to reuse a verified JWT payload; 0 disables
     
     # Rate Limiting
     rate_limit_requests: int = 100
@@ -66,6 +67,7 @@ class Settings(BaseSettings):
     max_portfolio_value: float = 1000000.0  # $1M limit for paper trading
     max_position_size_percent: float = 0.2  # 20% max position size
     default_risk_free_rate: float = 0.02  # 2% risk-free rate
+    risk_compute_workers: int = 2  # worker processes per API process for risk calculations
     
     @property
     def is_production(self) -> bool:
@@ -1,70 +1,110 @@
 """Main FastAPI application."""
 
-print("🚀 DEBUG: Starting app/main.py execution")
-print("🚀 DEBUG: Importing FastAPI...")
+import importlib
+from typing import List
 
-from fastapi import FastAPI
+import orjson
+from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-
-print("🚀 DEBUG: Importing app modules...")
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response
+from app import __version__
 from app.config import settings
 from app.routers import health, auth, assets, data, backtest, risk, trade, chat, websocket
 
-print("🚀 DEBUG: All imports successful")
-
-# Create FastAPI application
+# Create FastAPI application; the interactive docs are only served outside production
 app = FastAPI(
     title="TradeLab API",
     description="A comprehensive trading platform with backtesting, risk analysis, and paper trading",
-    version="1.0.2",
-    docs_url="/docs",
-    redoc_url="/redoc"
+    version=__version__,
+    docs_url=None if settings.is_production else "/docs",
+    redoc_url=None if settings.is_production else "/redoc",
+    default_response_class=ORJSONResponse
 )
 
+# Deployed frontends, used in production unless CORS_ORIGINS overrides them
+PRODUCTION_CORS_ORIGINS = [
+    "https://trade-lab-mu.vercel.app",
+    "https://trade-lab-git-main-abdullahalamaans-projects.vercel.app",
+]
+
+
+def _cors_origins() -> List[str]:
+    """Return only the origins for this environment: Vercel in production, localhost otherwise."""
+    if settings.is_production and "cors_origins" not in settings.model_fields_set:
+        return PRODUCTION_CORS_ORIGINS
+    return settings.cors_origins_list
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
+    allow_origins=_cors_origins(),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With"],
+    max_age=600,
 )
 
+# Compress large JSON payloads (backtest results, risk metrics, price history)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+
+# Railway liveness probe, kept separate from / and /api/v1/health
+@app.get("/health_check", response_class=PlainTextResponse, include_in_schema=False)
+async def health_check():
+    """Minimal liveness probe."""
+    return "ok"
+
+
 # Include routers
-app.include_router(health.router, prefix="/api/v1", tags=["health"])
-app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
-app.include_router(assets.router, prefix="/api/v1/assets", tags=["assets"])
-app.include_router(data.router, prefix="/api/v1/data", tags=["data"])
-app.include_router(backtest.router, prefix="/api/v1/backtest", tags=["backtesting"])
-app.include_router(risk.router, prefix="/api/v1/risk", tags=["risk"])
-app.include_router(trade.router, prefix="/api/v1/trade", tags=["trading"])
-app.include_router(chat.router, prefix="/api/v1/ai", tags=["data-context"])
-app.include_router(websocket.router, prefix="/api/v1", tags=["websocket"])
-
-
-@app.get("/")
+ROUTERS = (
+    (health, "", ["health"]),
+    (auth, "/auth", ["authentication"]),
+    (assets, "/assets", ["assets"]),
+    (data, "/data", ["data"]),
+    (backtest, "/backtest", ["backtesting"]),
+    (risk, "/risk", ["risk"]),
+    (trade, "/trade", ["trading"]),
+    (chat, "/ai", ["data-context"]),
+    (websocket, "", ["websocket"]),
+)
+
+# AI routers pull in google-generativeai, so they are only imported when AI is enabled
+AI_ROUTERS = (
+    ("llm_proxy", "", ["llm-proxy"]),
+    ("gemini", "", ["gemini-ai"]),
+)
+
+api_v1 = APIRouter(prefix="/api/v1")
+
+for module, prefix, tags in ROUTERS:
+    api_v1.include_router(module.router, prefix=prefix, tags=tags)
+
+if settings.ai_enabled:
+    for name, prefix, tags in AI_ROUTERS:
+        module = importlib.import_module(f"app.routers.{name}")
+        api_v1.include_router(module.router, prefix=prefix, tags=tags)
+
+app.include_router(api_v1)
+
+
+# / is static, so its body is serialised once at import
+_ROOT_BYTES = orjson.dumps({
+    "message": "Welcome to TradeLab API",
+    "version": __version__,
+    "docs": app.docs_url,
+    "status": "running",
+    "redoc": app.redoc_url
+})
+
+
+@app.get("/", response_class=Response)
 async def root():
     """Root endpoint."""
-    return {
-        "message": "Welcome to TradeLab API",
-        "version": "1.0.2",
-        "docs": "/docs",
-        "status": "deployed_on_vercel"
-    }
-
-@app.get("/test")
+    return Response(content=_ROOT_BYTES, media_type="application/json")
+
+@app.get("/test", response_class=PlainTextResponse)
 async def test():
     """Simple test endpoint."""
-    return {
-        "status": "ok",
-        "message": "API is working",
-        "python_version": "3.12"
-    }
-
-# For Railway deployment
-if __name__ == "__main__":
-    import uvicorn
-    import os
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
-
+    return "ok"
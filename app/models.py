@@ -1,6 +1,6 @@
 """SQLAlchemy models for the TradeLab database."""
 
-from sqlalchemy import Column, String, DateTime, Numeric, Integer, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Numeric, Integer, Boolean, Text, ForeignKey, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -47,12 +47,18 @@ class AssetPrice(Base):
     symbol = Column(String(20), nullable=False)
     asset_type = Column(String(10), nullable=False)
     timestamp = Column(DateTime(timezone=True), nullable=False)
-    open = Column(Numeric(20, 8), nullable=False)
-    high = Column(Numeric(20, 8), nullable=False)
-    low = Column(Numeric(20, 8), nullable=False)
-    close = Column(Numeric(20, 8), nullable=False)
+    # Prices feed float64 analytics, so they load as float rather than Decimal
+    open = Column(Numeric(20, 8, asdecimal=False), nullable=False)
+    high = Column(Numeric(20, 8, asdecimal=False), nullable=False)
+    low = Column(Numeric(20, 8, asdecimal=False), nullable=False)
+    close = Column(Numeric(20, 8, asdecimal=False), nullable=False)
     volume = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        # Matches the (symbol, asset_type) IN (...) AND timestamp >= cutoff price lookups
+        Index("idx_asset_prices_symbol_type_timestamp", "symbol", "asset_type", "timestamp"),
+    )
 
 
 class Strategy(Base):
@@ -127,3 +133,12 @@ class RiskMetric(Base):
     monte_carlo_results = Column(JSON)
     created_at = Column(DateTime(timezone=True), nullable=False)
 
+
+class PortfolioReturnsCache(Base):
+    """Cached equal-weight daily returns for a portfolio."""
+    __tablename__ = "portfolio_returns_cache"
+    
+    portfolio_id = Column(UUID(as_uuid=True), ForeignKey("portfolios.id", ondelete="CASCADE"), primary_key=True)
+    dates = Column(JSON, nullable=False)  # ISO dates aligned with returns
+    returns = Column(JSON, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,5 +1,6 @@
 # Routers package
-from . import health, auth, assets, data, backtest, risk, trade, chat, websocket, llm_proxy, gemini
+# llm_proxy and gemini are imported by app.main only when AI is enabled
+from . import health, auth, assets, data, backtest, risk, trade, chat, websocket
 
 __all__ = [
     "health",
@@ -10,7 +11,5 @@ __all__ = [
     "risk",
     "trade",
     "chat",
-    "websocket",
-    "llm_proxy",
-    "gemini"
+    "websocket"
 ]
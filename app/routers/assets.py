@@ -354,6 +354,8 @@ async def delete_asset(
             detail="Asset not found"
         )
     
+    # Mark the portfolio as changed so cached risk metrics are recalculated
+    asset.portfolio.updated_at = datetime.utcnow()
     db.delete(asset)
     db.commit()
     return {"message": "Asset deleted successfully"}
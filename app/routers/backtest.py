@@ -138,10 +138,10 @@ async def run_backtest(
         df = pd.DataFrame([
             {
                 'datetime': price.timestamp,
-                'open': float(price.open),
-                'high': float(price.high),
-                'low': float(price.low),
-                'close': float(price.close),
+                'open': price.open,
+                'high': price.high,
+                'low': price.low,
+                'close': price.close,
                 'volume': price.volume
             }
             for price in prices
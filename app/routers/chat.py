@@ -476,7 +476,7 @@ async def _get_market_context(db: Session):
                 market_data.append({
                     "symbol": recent_price.symbol,
                     "asset_type": recent_price.asset_type,
-                    "price": float(recent_price.close),
+                    "price": recent_price.close,
                     "timestamp": recent_price.timestamp.isoformat()
                 })
         
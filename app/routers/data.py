@@ -6,7 +6,9 @@ from app.database import get_db
 from app.auth import get_current_user
 from app.schemas import DataFetchRequest, AssetPriceCreate, AssetPrice
 from app.models import AssetPrice as AssetPriceModel
+from app.routers.risk import invalidate_spy_returns_cache
 from datetime import datetime, timedelta
+import asyncio
 import yfinance as yf
 from binance.client import Client as BinanceClient
 from app.config import settings
@@ -66,14 +68,15 @@ async def _fetch_stock_data(request: DataFetchRequest, db: Session = None):
         
         print(f"Fetching data for {request.symbol} from {start_date} to {end_date}")
         
-        # Fetch data from Yahoo Finance with retry mechanism
+        # Fetch data from Yahoo Finance with retry mechanism; yfinance blocks, so each
+        # network call runs in a worker thread to keep the event loop free
         ticker = yf.Ticker(request.symbol)
         
         # Try different methods to get data
         data = None
         try:
             # Method 1: Try with period instead of dates
-            data = ticker.history(period="1mo")
+            data = await asyncio.to_thread(ticker.history, period="1mo")
             if not data.empty:
                 # Filter to requested date range
                 data = data[(data.index >= start_date) & (data.index <= end_date)]
@@ -81,12 +84,14 @@ async def _fetch_stock_data(request: DataFetchRequest, db: Session = None):
             print(f"Method 1 failed: {e1}")
             try:
                 # Method 2: Try with different date format
-                data = ticker.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
+                data = await asyncio.to_thread(
+                    ticker.history, start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d')
+                )
             except Exception as e2:
                 print(f"Method 2 failed: {e2}")
                 try:
                     # Method 3: Try with just the symbol info
-                    info = ticker.info
+                    info = await asyncio.to_thread(lambda: ticker.info)
                     if info and 'regularMarketPrice' in info:
                         # Create a single data point with current price
                         current_price = info['regularMarketPrice']
@@ -103,7 +108,7 @@ async def _fetch_stock_data(request: DataFetchRequest, db: Session = None):
                     print(f"Method 3 failed: {e3}")
                     try:
                         # Method 4: Try with a different approach - get current price
-                        current_price = ticker.history(period="1d").iloc[-1]['Close']
+                        current_price = (await asyncio.to_thread(ticker.history, period="1d")).iloc[-1]['Close']
                         data = pd.DataFrame({
                             'Open': [current_price],
                             'High': [current_price],
@@ -115,7 +120,7 @@ async def _fetch_stock_data(request: DataFetchRequest, db: Session = None):
                         print(f"Method 4 failed: {e4}")
                         try:
                             # Method 5: Try with a longer period and filter
-                            data = ticker.history(period="3mo")
+                            data = await asyncio.to_thread(ticker.history, period="3mo")
                             if not data.empty:
                                 data = data[(data.index >= start_date) & (data.index <= end_date)]
                         except Exception as e5:
@@ -190,6 +195,9 @@ async def _fetch_stock_data(request: DataFetchRequest, db: Session = None):
                     continue
             
             db.commit()
+            if stored_count and request.symbol == "SPY" and request.asset_type == "stock":
+                # Beta reads SPY returns from an in-process cache; evict it for the new prices
+                invalidate_spy_returns_cache()
         else:
             stored_count = len(data)
         
@@ -246,7 +254,8 @@ async def _fetch_crypto_data(request: DataFetchRequest, db: Session = None):
                 if client is None:
                     raise Exception("Binance client not available")
                     
-                klines = client.get_historical_klines(
+                klines = await asyncio.to_thread(
+                    client.get_historical_klines,
                     symbol=symbol,
                     interval="1d",
                     start_str=start_time,
@@ -389,10 +398,10 @@ async def get_price_data(
         "prices": [
             {
                 "timestamp": price.timestamp.isoformat(),
-                "open": float(price.open),
-                "high": float(price.high),
-                "low": float(price.low),
-                "close": float(price.close),
+                "open": price.open,
+                "high": price.high,
+                "low": price.low,
+                "close": price.close,
                 "volume": price.volume
             }
             for price in prices
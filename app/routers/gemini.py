@@ -200,7 +200,7 @@ Please provide a helpful, accurate response based on the context data provided."
         return StreamingResponse(
             generate_chunks(),
             media_type="text/plain",
-            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+            headers={"Cache-Control": "no-cache", "Connection": "keep-alive", "Content-Encoding": "identity"}
         )
         
     except Exception as e:
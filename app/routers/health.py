@@ -2,6 +2,7 @@
 
 from fastapi import APIRouter
 from datetime import datetime
+from app import __version__
 from app.schemas import HealthResponse
 
 router = APIRouter()
@@ -22,7 +23,7 @@ async def detailed_health_check():
     health_status = {
         "status": "healthy",
         "timestamp": datetime.utcnow(),
-        "version": "1.0.0",
+        "version": __version__,
         "services": {
             "database": "unknown",
             "supabase": "unknown",
@@ -9,8 +9,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-import json
+import orjson
 import asyncio
+import time
 
 router = APIRouter()
 
@@ -28,6 +29,21 @@ class LLMResponse(BaseModel):
 # Configuration - you can set this via environment variables
 OLLAMA_HOST = "http://localhost:11434"  # Change this to your Ollama server URL
 
+# Short-lived response caches so concurrent UI polls share a single Ollama call
+MODELS_CACHE_TTL = 300  # seconds
+HEALTH_CACHE_TTL = 30  # seconds
+_models_cache = {"ts": 0.0, "data": None}
+_health_cache = {"ts": 0.0, "data": None}
+_models_lock = asyncio.Lock()
+_health_lock = asyncio.Lock()
+
+
+def _cached_response(cache: dict, ttl: float) -> Optional[dict]:
+    """Return the cached response if it is younger than ttl seconds."""
+    if cache["data"] is not None and time.monotonic() - cache["ts"] < ttl:
+        return cache["data"]
+    return None
+
 @router.post("/llm/generate", response_model=LLMResponse)
 async def generate_response(request: LLMRequest):
     """
@@ -61,7 +77,8 @@ async def generate_response(request: LLMRequest):
                 # Handle streaming response
                 return StreamingResponse(
                     stream_ollama_response(response),
-                    media_type="text/plain"
+                    media_type="text/plain",
+                    headers={"Content-Encoding": "identity"}
                 )
             else:
                 # Handle non-streaming response
@@ -93,47 +110,76 @@ async def stream_ollama_response(response):
     async for line in response.aiter_lines():
         if line.strip():
             try:
-                data = json.loads(line)
+                data = orjson.loads(line)
                 if "response" in data:
                     yield data["response"]
                 if data.get("done", False):
                     break
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 continue
 
 @router.get("/llm/models")
 async def get_available_models():
     """Get list of available models from Ollama."""
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{OLLAMA_HOST}/api/tags")
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Ollama API error: {response.text}"
-                )
-            
-            data = response.json()
-            return {
-                "models": data.get("models", []),
-                "ollama_host": OLLAMA_HOST
-            }
-            
-    except httpx.ConnectError:
-        raise HTTPException(
-            status_code=503,
-            detail="Ollama server is not accessible. Please ensure Ollama is running on the server."
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error communicating with Ollama: {str(e)}"
-        )
+    cached = _cached_response(_models_cache, MODELS_CACHE_TTL)
+    if cached is not None:
+        return cached
+    
+    async with _models_lock:
+        # Another request may have refreshed the cache while we waited
+        cached = _cached_response(_models_cache, MODELS_CACHE_TTL)
+        if cached is not None:
+            return cached
+        
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(f"{OLLAMA_HOST}/api/tags")
+                
+                if response.status_code != 200:
+                    raise HTTPException(
+                        status_code=response.status_code,
+                        detail=f"Ollama API error: {response.text}"
+                    )
+                
+                data = response.json()
+                result = {
+                    "models": data.get("models", []),
+                    "ollama_host": OLLAMA_HOST
+                }
+                _models_cache.update(ts=time.monotonic(), data=result)
+                return result
+                
+        except httpx.ConnectError:
+            raise HTTPException(
+                status_code=503,
+                detail="Ollama server is not accessible. Please ensure Ollama is running on the server."
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error communicating with Ollama: {str(e)}"
+            )
 
 @router.get("/llm/health")
 async def check_ollama_health():
     """Check if Ollama is running and accessible."""
+    cached = _cached_response(_health_cache, HEALTH_CACHE_TTL)
+    if cached is not None:
+        return cached
+    
+    async with _health_lock:
+        # Another request may have refreshed the cache while we waited
+        cached = _cached_response(_health_cache, HEALTH_CACHE_TTL)
+        if cached is not None:
+            return cached
+        
+        result = await _probe_ollama_health()
+        _health_cache.update(ts=time.monotonic(), data=result)
+        return result
+
+
+async def _probe_ollama_health() -> dict:
+    """Query Ollama's model catalog and summarise whether it is reachable."""
     try:
         async with httpx.AsyncClient(timeout=5.0) as client:
             response = await client.get(f"{OLLAMA_HOST}/api/tags")
@@ -1,19 +1,55 @@
 """Risk analysis endpoints."""
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, cast, func, tuple_, Date, Float
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_db_session
 from app.auth import get_current_user
+from app.config import settings
 from app.schemas import RiskMetricsRequest, RiskMetrics
-from app.models import RiskMetric, AssetPrice, Portfolio, Asset
+from app.models import RiskMetric, AssetPrice, Portfolio, Asset, PortfolioReturnsCache
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from scipy import stats
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union
+import asyncio
+import logging
+import multiprocessing
+import threading
 import uuid
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+try:
+    from numba import njit, prange, set_num_threads
+except ImportError:  # Numba is optional; Monte Carlo falls back to NumPy
+    njit = None
+
+try:
+    import cupy as cp
+except ImportError:  # CuPy is optional; large simulations stay on the CPU
+    cp = None
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Monte Carlo horizon and the slice of paths returned for visualization
+MC_NUM_DAYS = 252  # Trading days
+MC_NUM_PATHS = 100
+MC_PATH_STRIDE = 5
+# Below this many simulations the host-device transfer outweighs the GPU speedup
+MC_GPU_MIN_SIMULATIONS = 50_000
+
+# Price history window for risk calculations, evaluated by the database as now() - interval
+# so every request binds the same parameter
+PRICE_LOOKBACK = timedelta(days=365)
+
+# Worker processes for CPU-bound risk calculations, created on first use
+_compute_pool: Optional[ProcessPoolExecutor] = None
 
 
 @router.post("/calculate", response_model=RiskMetrics)
@@ -23,245 +59,560 @@ async def calculate_risk_metrics(
     db: Session = Depends(get_db)
 ):
     """Calculate risk metrics for a portfolio."""
-    try:
-        # Verify portfolio belongs to user
-        portfolio = db.query(Portfolio).filter(
-            Portfolio.id == request.portfolio_id,
-            Portfolio.user_id == current_user["user_id"]
-        ).first()
-        
-        if not portfolio:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Portfolio not found"
+    # Verify portfolio belongs to user
+    portfolio = db.query(Portfolio).filter(
+        Portfolio.id == request.portfolio_id,
+        Portfolio.user_id == current_user["user_id"]
+    ).first()
+    
+    if not portfolio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Portfolio not found"
+        )
+    
+    # Get all assets in portfolio
+    assets = db.query(Asset).filter(Asset.portfolio_id == request.portfolio_id).all()
+    logger.debug("Found %d assets in portfolio %s", len(assets), request.portfolio_id)
+    
+    # Beta depends on SPY; its latest ingest both invalidates stored metrics and keys the SPY cache
+    latest_spy_ingest = _latest_spy_ingest(db)
+    
+    portfolio_returns: Optional[pd.Series] = None
+    if not assets:
+        # Generate mock data for demonstration when portfolio is empty
+        logger.debug("Portfolio has no assets, generating mock data for risk analysis demonstration")
+        mock_assets = [
+            Asset(
+                id=uuid.uuid4(),
+                portfolio_id=request.portfolio_id,
+                symbol="AAPL",
+                asset_type="stock",
+                name="Apple Inc.",
+                exchange="NASDAQ",
+                created_at=datetime.utcnow(),
+                updated_at=datetime.utcnow()
+            ),
+            Asset(
+                id=uuid.uuid4(),
+                portfolio_id=request.portfolio_id,
+                symbol="MSFT",
+                asset_type="stock", 
+                name="Microsoft Corporation",
+                exchange="NASDAQ",
+                created_at=datetime.utcnow(),
+                updated_at=datetime.utcnow()
             )
-        
-        # Get all assets in portfolio
-        assets = db.query(Asset).filter(Asset.portfolio_id == request.portfolio_id).all()
-        print(f"Found {len(assets)} assets in portfolio {request.portfolio_id}")
-        
-        if not assets:
-            # Generate mock data for demonstration when portfolio is empty
-            print("Portfolio has no assets, generating mock data for risk analysis demonstration")
-            mock_assets = [
-                Asset(
-                    id=uuid.uuid4(),
-                    portfolio_id=request.portfolio_id,
-                    symbol="AAPL",
-                    asset_type="stock",
-                    name="Apple Inc.",
-                    exchange="NASDAQ",
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                ),
-                Asset(
-                    id=uuid.uuid4(),
-                    portfolio_id=request.portfolio_id,
-                    symbol="MSFT",
-                    asset_type="stock", 
-                    name="Microsoft Corporation",
-                    exchange="NASDAQ",
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-            ]
-            portfolio_data = generate_mock_portfolio_data(mock_assets)
-        else:
-            # Get price data for all assets
-            portfolio_data = {}
-            for asset in assets:
-                print(f"Looking for price data for {asset.symbol} ({asset.asset_type})")
-                prices = db.query(AssetPrice).filter(
-                    AssetPrice.symbol == asset.symbol,
-                    AssetPrice.asset_type == asset.asset_type,
-                    AssetPrice.timestamp >= datetime.utcnow() - timedelta(days=365)  # Last year
-                ).order_by(AssetPrice.timestamp).all()
-                
-                print(f"Found {len(prices)} price records for {asset.symbol}")
-                
-                if prices:
-                    df = pd.DataFrame([
-                        {
-                            'date': price.timestamp,
-                            'close': float(price.close)
-                        }
-                        for price in prices
-                    ])
-                    df.set_index('date', inplace=True)
-                    df['returns'] = df['close'].pct_change().dropna()
-                    portfolio_data[asset.symbol] = df
-                    print(f"Created returns series with {len(df['returns'])} data points for {asset.symbol}")
+        ]
+        portfolio_data = generate_mock_portfolio_data(mock_assets)
+        closes = pd.DataFrame({symbol: df['close'] for symbol, df in portfolio_data.items()})
+    else:
+        changed_at = _inputs_changed_at(db, portfolio, assets)
+        
+        # Reuse the latest stored metrics if nothing they depend on has changed. Stored rows
+        # hold only the Monte Carlo summary, so cached responses carry no simulated_paths.
+        cached_metrics = _latest_fresh_risk_metric(db, portfolio.id, changed_at, latest_spy_ingest)
+        if cached_metrics is not None:
+            logger.debug("Returning cached risk metrics %s", cached_metrics.id)
+            return cached_metrics
+        
+        portfolio_returns = _cached_portfolio_returns(db, portfolio.id, changed_at)
+        if portfolio_returns is None:
+            # Get price data for all assets in one query as a date x symbol matrix
+            closes = _read_close_matrix(db, [(asset.symbol, asset.asset_type) for asset in assets])
+            logger.debug("Found %d price dates for %d assets", closes.shape[0], closes.shape[1])
             
-            if not portfolio_data:
-                print("No price data found, generating mock data for risk analysis")
+            if closes.empty:
+                logger.debug("No price data found, generating mock data for risk analysis")
                 # Generate mock data for demonstration
                 portfolio_data = generate_mock_portfolio_data(assets)
-        
-        
+                closes = pd.DataFrame({symbol: df['close'] for symbol, df in portfolio_data.items()})
+            else:
+                portfolio_returns = _portfolio_returns(closes)
+                _store_portfolio_returns(db, portfolio.id, portfolio_returns)
+    
+    if portfolio_returns is None:
         # Calculate portfolio returns (equal weight for now)
-        print(f"Portfolio data keys: {list(portfolio_data.keys())}")
-        
-        # Combine all asset returns into a single DataFrame
-        if len(portfolio_data) == 1:
-            # Single asset case
-            asset_symbol = list(portfolio_data.keys())[0]
-            portfolio_returns = portfolio_data[asset_symbol]['returns']
-        else:
-            # Multiple assets case - combine returns
-            returns_data = {}
-            for symbol, df in portfolio_data.items():
-                returns_data[symbol] = df['returns']
-            
-            # Create DataFrame from returns data
-            combined_df = pd.DataFrame(returns_data)
-            portfolio_returns = combined_df.mean(axis=1).dropna()
-        
-        print(f"Portfolio returns calculated: {len(portfolio_returns)} data points")
-        
-        if len(portfolio_returns) < 2:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient data for risk analysis. Need at least 2 data points."
-            )
-        
-        # Calculate risk metrics
-        var_95 = calculate_var(portfolio_returns, 0.95)
-        cvar_95 = calculate_cvar(portfolio_returns, 0.95)
-        sharpe_ratio = calculate_sharpe_ratio(portfolio_returns)
-        sortino_ratio = calculate_sortino_ratio(portfolio_returns)
-        max_drawdown = calculate_max_drawdown(portfolio_returns)
-        
-        # Calculate Beta (vs SPY)
-        beta = await calculate_beta(portfolio_returns, db)
-        
-        # Run Monte Carlo simulation
-        monte_carlo_results = run_monte_carlo_simulation(portfolio_returns)
-        
-        # Create risk metrics record
-        risk_metrics = RiskMetric(
-            id=uuid.uuid4(),
-            portfolio_id=request.portfolio_id,
-            calculated_at=datetime.utcnow(),
-            var_95=var_95,
-            cvar_95=cvar_95,
-            sharpe_ratio=sharpe_ratio,
-            sortino_ratio=sortino_ratio,
-            beta=beta,
-            max_drawdown=max_drawdown,
-            monte_carlo_results=monte_carlo_results,
-            created_at=datetime.utcnow()
+        portfolio_returns = _portfolio_returns(closes)
+    
+    logger.debug("Portfolio returns calculated: %d data points", len(portfolio_returns))
+    
+    if len(portfolio_returns) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient data for risk analysis. Need at least 2 data points."
         )
-        
-        db.add(risk_metrics)
+    
+    returns_ts = _index_as_int64(portfolio_returns.index)
+    returns_np = _as_array(portfolio_returns)
+    
+    # Run the CPU-bound metrics and Monte Carlo in a worker process while SPY loads in a thread
+    metrics, (spy_ts, spy_returns) = await asyncio.gather(
+        _run_in_compute_pool(_compute_risk, returns_np),
+        asyncio.to_thread(_load_spy_returns_isolated, latest_spy_ingest)
+    )
+    metrics["beta"] = _beta_from_arrays(returns_ts, returns_np, spy_ts, spy_returns)
+    
+    # Persist only the Monte Carlo summary; the sampled paths are returned but not stored
+    monte_carlo_results = metrics["monte_carlo_results"]
+    monte_carlo_summary = {key: value for key, value in monte_carlo_results.items() if key != "simulated_paths"}
+    
+    # Create risk metrics record
+    risk_metrics = RiskMetric(
+        id=uuid.uuid4(),
+        portfolio_id=request.portfolio_id,
+        calculated_at=datetime.utcnow(),
+        var_95=metrics["var"],
+        cvar_95=metrics["cvar"],
+        sharpe_ratio=metrics["sharpe_ratio"],
+        sortino_ratio=metrics["sortino_ratio"],
+        beta=metrics["beta"],
+        max_drawdown=metrics["max_drawdown"],
+        monte_carlo_results=monte_carlo_summary,
+        created_at=datetime.utcnow()
+    )
+    
+    # Only the write needs DB error handling; HTTPExceptions above propagate untouched
+    try:
+        with db.begin_nested():
+            db.add(risk_metrics)
         db.commit()
         db.refresh(risk_metrics)
-        
-        return risk_metrics
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions as-is
-        raise
-    except Exception as e:
+    except SQLAlchemyError as e:
         db.rollback()
-        print(f"Risk calculation error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Error saving risk metrics: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error calculating risk metrics: {str(e)}"
+            detail=f"Error saving risk metrics: {str(e)}"
+        )
+    
+    response = RiskMetrics.model_validate(risk_metrics)
+    response.monte_carlo_results = monte_carlo_results
+    return response
+
+
+def _inputs_changed_at(db: Session, portfolio: Portfolio, assets: List[Asset]) -> Optional[datetime]:
+    """When the portfolio, its assets or their prices last changed; None if there are no prices."""
+    if not assets:
+        return None
+    
+    pairs = [(asset.symbol, asset.asset_type) for asset in assets]
+    # Only rows inside the price window feed the metrics; the timestamp bound also lets the
+    # (symbol, asset_type, timestamp) index narrow the scan instead of reading all history
+    latest_price_ingest = db.query(func.max(AssetPrice.created_at)).filter(
+        tuple_(AssetPrice.symbol, AssetPrice.asset_type).in_(pairs),
+        AssetPrice.timestamp >= func.now() - PRICE_LOOKBACK
+    ).scalar()
+    if latest_price_ingest is None:
+        return None
+    
+    return max([latest_price_ingest, portfolio.updated_at] + [asset.updated_at for asset in assets])
+
+
+def _latest_spy_ingest(db: Session) -> Optional[datetime]:
+    """When SPY prices inside the price window were last ingested; None if there are none."""
+    return db.query(func.max(AssetPrice.created_at)).filter(
+        AssetPrice.symbol == "SPY",
+        AssetPrice.asset_type == "stock",
+        AssetPrice.timestamp >= func.now() - PRICE_LOOKBACK
+    ).scalar()
+
+
+def _latest_fresh_risk_metric(
+    db: Session,
+    portfolio_id: uuid.UUID,
+    changed_at: Optional[datetime],
+    latest_spy_ingest: Optional[datetime]
+) -> Optional[RiskMetric]:
+    """Return today's newest RiskMetric calculated after the portfolio inputs and SPY prices last changed."""
+    if changed_at is None:
+        # Metrics built from mock data are never reused
+        return None
+    
+    # Beta depends on SPY, so a new SPY ingest also invalidates stored metrics
+    if latest_spy_ingest is not None:
+        changed_at = max(changed_at, latest_spy_ingest)
+    
+    # The price window is relative to today, so older rows are stale even without new prices
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return db.query(RiskMetric).filter(
+        RiskMetric.portfolio_id == portfolio_id,
+        RiskMetric.calculated_at > changed_at,
+        RiskMetric.calculated_at >= today
+    ).order_by(RiskMetric.calculated_at.desc()).first()
+
+
+def _cached_portfolio_returns(db: Session, portfolio_id: uuid.UUID, changed_at: Optional[datetime]) -> Optional[pd.Series]:
+    """Return stored portfolio returns computed today and after the portfolio inputs last changed."""
+    if changed_at is None:
+        return None
+    
+    # The price window is relative to today, so older rows are stale even without new prices
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        cached = db.query(PortfolioReturnsCache).filter(
+            PortfolioReturnsCache.portfolio_id == portfolio_id,
+            PortfolioReturnsCache.computed_at > changed_at,
+            PortfolioReturnsCache.computed_at >= today
+        ).first()
+    except SQLAlchemyError as e:
+        # Like a failed write, a failed read (e.g. the table is not migrated yet) only means recomputing
+        db.rollback()
+        logger.warning("Error reading cached portfolio returns: %s", e)
+        return None
+    if cached is None:
+        return None
+    
+    return pd.Series(cached.returns, index=pd.to_datetime(cached.dates), dtype=np.float64)
+
+
+def _store_portfolio_returns(db: Session, portfolio_id: uuid.UUID, portfolio_returns: pd.Series) -> None:
+    """Persist portfolio returns for reuse; a failed write only means recomputing next time."""
+    try:
+        db.merge(PortfolioReturnsCache(
+            portfolio_id=portfolio_id,
+            dates=[day.isoformat() for day in portfolio_returns.index.date],
+            returns=portfolio_returns.tolist(),
+            computed_at=datetime.utcnow()
+        ))
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning("Error caching portfolio returns: %s", e)
+
+
+def _load_returns(db: Session, assets: List[Asset]) -> pd.DataFrame:
+    """Load the last year of daily returns for all assets with one query, as a date x symbol matrix."""
+    return _returns_matrix(_read_close_matrix(db, [(asset.symbol, asset.asset_type) for asset in assets]))
+
+
+def _read_close_matrix(db: Session, pairs: List[Tuple[str, str]]) -> pd.DataFrame:
+    """Read the last year of daily closes for (symbol, asset_type) pairs as a date x symbol matrix."""
+    if not pairs:
+        return pd.DataFrame()
+    
+    stmt = select(
+        cast(AssetPrice.timestamp, Date).label("date"),
+        AssetPrice.symbol,
+        cast(AssetPrice.close, Float).label("close")
+    ).where(
+        tuple_(AssetPrice.symbol, AssetPrice.asset_type).in_(pairs),
+        AssetPrice.timestamp >= func.now() - PRICE_LOOKBACK
+    ).order_by(AssetPrice.timestamp)
+    
+    # read_sql fills typed columns straight from the DBAPI cursor, skipping ORM hydration
+    df = pd.read_sql(stmt, db.connection(), parse_dates=["date"])
+    # One row per day and one column per symbol; the last bar of a day wins
+    return df.pivot_table(index="date", columns="symbol", values="close", aggfunc="last")
+
+
+def _returns_matrix(closes: pd.DataFrame) -> pd.DataFrame:
+    """Daily returns for every column of a close matrix in one vectorized step.
+    
+    Each close is divided by the asset's previous available close, so assets
+    with different trading calendars (stocks vs crypto) keep their own returns
+    instead of picking up zero or missing values on days they did not trade.
+    """
+    return closes / closes.ffill().shift(1) - 1
+
+
+def _get_compute_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool for CPU-bound risk calculations, creating it on first use."""
+    global _compute_pool
+    if _compute_pool is None:
+        # Sized explicitly: os.cpu_count() reports host CPUs, not the container's quota.
+        # forkserver, because forking the multi-threaded server process can deadlock; workers
+        # import this module afresh and _warm_up_kernels sets up everything they need
+        _compute_pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.risk_compute_workers),
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_warm_up_kernels
+        )
+    return _compute_pool
+
+
+def _discard_compute_pool(pool: ProcessPoolExecutor) -> None:
+    """Shut down a broken pool and forget it, unless another request already replaced it."""
+    global _compute_pool
+    if _compute_pool is pool:
+        _compute_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_in_compute_pool(fn, *args):
+    """Run fn in the compute pool, recreating the pool and retrying once if a worker died."""
+    loop = asyncio.get_running_loop()
+    pool = _get_compute_pool()
+    try:
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A worker was killed (e.g. OOM) or its initializer raised; the pool never recovers on its own
+        logger.warning("Risk compute pool is broken, recreating it")
+        _discard_compute_pool(pool)
+        return await loop.run_in_executor(_get_compute_pool(), fn, *args)
+
+
+def _warm_up_kernels() -> None:
+    """Prepare a worker before its first task: reseed the Monte Carlo generator and compile the Numba kernels."""
+    global _mc_rng
+    # Never rely on a generator state that may be shared with a parent process
+    _mc_rng = np.random.default_rng()
+    
+    # Runs in each worker rather than at import: Numba's thread pool must not be started before fork
+    if njit is not None:
+        # The pool already spreads requests over processes; one thread each avoids oversubscription
+        set_num_threads(1)
+    if _monte_carlo_kernel is not None:
+        _monte_carlo_kernel(
+            0.0, 0.01, MC_NUM_DAYS, MC_PATH_STRIDE,
+            np.empty(1, dtype=np.float32), np.empty((1, -(-MC_NUM_DAYS // MC_PATH_STRIDE)), dtype=np.float32)
         )
+    if _risk_moments_kernel is not None:
+        _risk_moments_kernel(np.zeros(2, dtype=np.float64), 0)
+
+
+def _compute_risk(returns_np: np.ndarray) -> Dict[str, Any]:
+    """Pure-compute risk pipeline on plain arrays, safe to run in a worker process."""
+    metrics: Dict[str, Any] = compute_risk_summary(returns_np, 0.95)
+    metrics["monte_carlo_results"] = run_monte_carlo_simulation(returns_np)
+    return metrics
+
+
+def _portfolio_returns(closes: pd.DataFrame) -> pd.Series:
+    """Equal-weight portfolio returns from a close matrix, with plain NumPy for a single asset."""
+    if closes.shape[1] == 1:
+        # pivot_table drops dates without a close, so adjacent rows are adjacent closes
+        close = closes.iloc[:, 0].to_numpy(dtype=np.float64)
+        return pd.Series(close[1:] / close[:-1] - 1, index=closes.index[1:])
+    return _equal_weight_returns(_returns_matrix(closes))
+
+
+def _equal_weight_returns(returns_df: pd.DataFrame) -> pd.Series:
+    """Equal-weight portfolio returns as a NaN-aware mean across the asset columns."""
+    with warnings.catch_warnings():
+        # Rows where every asset is NaN (e.g. the first row) are dropped below
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        mean_returns = np.nanmean(returns_df.to_numpy(dtype=np.float64), axis=1)
+    return pd.Series(mean_returns, index=returns_df.index).dropna()
+
+
+def compute_risk_summary(
+    returns_np: Union[pd.Series, np.ndarray],
+    confidence_level: float = 0.95,
+    risk_free_rate: float = 0.02
+) -> Dict[str, float]:
+    """Calculate VaR, CVaR, Sharpe, Sortino and max drawdown in a single pass over the returns."""
+    r = _as_array(returns_np)
+    n = r.size
+    summary = {"var": 0.0, "cvar": 0.0, "sharpe_ratio": 0.0, "sortino_ratio": 0.0, "max_drawdown": 0.0}
+    if n == 0:
+        return summary
+    
+    k = int((1 - confidence_level) * n)
+    fused = _risk_moments_kernel if _risk_moments_kernel is not None else _risk_moments_numpy
+    var, cvar, mean, std, downside_std, max_drawdown = fused(r, k)
+    summary["var"] = _finite_or_zero(var)
+    summary["cvar"] = _finite_or_zero(cvar)
+    
+    if n < 2:
+        return summary
+    
+    excess_mean = mean - risk_free_rate / 252  # Daily risk-free rate
+    
+    if std > 0:
+        summary["sharpe_ratio"] = _finite_or_zero(excess_mean / std * np.sqrt(252))
+    
+    # NaN when there are fewer than two negative returns
+    if downside_std > 0:
+        summary["sortino_ratio"] = _finite_or_zero(excess_mean / downside_std * np.sqrt(252))
+    
+    summary["max_drawdown"] = _finite_or_zero(max_drawdown)
+    
+    return summary
+
+
+def _risk_moments_numpy(r: np.ndarray, k: int) -> Tuple[float, float, float, float, float, float]:
+    """VaR, CVaR, mean, std, downside std and max drawdown of a returns array with NumPy."""
+    # VaR/CVaR: a partial sort places the k-th smallest return in position, O(n)
+    partitioned = np.partition(r, k)
+    downside = r[r < 0]
+    cumulative = np.cumprod(1 + r)
+    return (
+        partitioned[k],
+        partitioned[:k + 1].mean(),
+        r.mean(),
+        r.std(ddof=1) if r.size >= 2 else np.nan,
+        downside.std(ddof=1) if downside.size >= 2 else np.nan,
+        (cumulative / np.maximum.accumulate(cumulative) - 1).min()
+    )
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _risk_moments_kernel(r, k):
+        """Same outputs as _risk_moments_numpy, with the moments and drawdown fused into one loop."""
+        partitioned = np.partition(r, k)
+        mean = 0.0
+        m2 = 0.0
+        downside_n = 0
+        downside_mean = 0.0
+        downside_m2 = 0.0
+        value = 1.0
+        peak = -np.inf
+        max_drawdown = 0.0
+        for i in range(r.size):
+            x = r[i]
+            # Welford updates keep the variance stable without a second pass
+            delta = x - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x - mean)
+            if x < 0:
+                downside_n += 1
+                delta = x - downside_mean
+                downside_mean += delta / downside_n
+                downside_m2 += delta * (x - downside_mean)
+            value *= 1.0 + x
+            peak = max(peak, value)
+            max_drawdown = min(max_drawdown, value / peak - 1.0)
+        std = np.sqrt(m2 / (r.size - 1)) if r.size >= 2 else np.nan
+        downside_std = np.sqrt(downside_m2 / (downside_n - 1)) if downside_n >= 2 else np.nan
+        return partitioned[k], partitioned[:k + 1].mean(), mean, std, downside_std, max_drawdown
+else:
+    _risk_moments_kernel = None
+
+
+def _as_array(returns: Union[pd.Series, np.ndarray]) -> np.ndarray:
+    """Returns as a float64 ndarray, without copying when they already are one."""
+    return np.asarray(returns, dtype=np.float64)
+
+
+def _finite_or_zero(value: float) -> float:
+    """Convert a NumPy scalar to float, mapping NaN to 0.0."""
+    value = float(value)
+    return value if not np.isnan(value) else 0.0
 
 
 def calculate_var(returns: pd.Series, confidence_level: float) -> float:
     """Calculate Value at Risk (VaR)."""
-    var = np.percentile(returns, (1 - confidence_level) * 100)
-    return float(var) if not np.isnan(var) else 0.0
+    return compute_risk_summary(returns, confidence_level)["var"]
 
 
 def calculate_cvar(returns: pd.Series, confidence_level: float) -> float:
     """Calculate Conditional Value at Risk (CVaR)."""
-    var = calculate_var(returns, confidence_level)
-    tail_returns = returns[returns <= var]
-    if len(tail_returns) == 0:
-        return 0.0
-    cvar = tail_returns.mean()
-    return float(cvar) if not np.isnan(cvar) else 0.0
+    return compute_risk_summary(returns, confidence_level)["cvar"]
 
 
 def calculate_sharpe_ratio(returns: pd.Series, risk_free_rate: float = 0.02) -> float:
     """Calculate Sharpe ratio."""
-    if returns.std() == 0 or len(returns) < 2:
-        return 0.0
-    excess_returns = returns - risk_free_rate / 252  # Daily risk-free rate
-    sharpe = excess_returns.mean() / returns.std() * np.sqrt(252)
-    return float(sharpe) if not np.isnan(sharpe) else 0.0
+    return compute_risk_summary(returns, risk_free_rate=risk_free_rate)["sharpe_ratio"]
 
 
 def calculate_sortino_ratio(returns: pd.Series, risk_free_rate: float = 0.02) -> float:
     """Calculate Sortino ratio."""
-    excess_returns = returns - risk_free_rate / 252
-    downside_returns = returns[returns < 0]
-    downside_std = downside_returns.std() if len(downside_returns) > 0 else 0
-    if downside_std == 0 or len(downside_returns) < 2:
-        return 0.0
-    sortino = excess_returns.mean() / downside_std * np.sqrt(252)
-    return float(sortino) if not np.isnan(sortino) else 0.0
+    return compute_risk_summary(returns, risk_free_rate=risk_free_rate)["sortino_ratio"]
 
 
 def calculate_max_drawdown(returns: pd.Series) -> float:
     """Calculate maximum drawdown."""
-    if len(returns) < 2:
-        return 0.0
-    cumulative = (1 + returns).cumprod()
-    running_max = cumulative.expanding().max()
-    drawdown = (cumulative - running_max) / running_max
-    max_dd = drawdown.min()
-    return float(max_dd) if not np.isnan(max_dd) else 0.0
+    return compute_risk_summary(returns)["max_drawdown"]
 
 
-async def calculate_beta(portfolio_returns: pd.Series, db: Session) -> float:
-    """Calculate Beta vs SPY."""
-    try:
-        # Get SPY data
-        spy_prices = db.query(AssetPrice).filter(
+# SPY returns only change when SPY is ingested, so keep them in process memory keyed on the
+# latest ingest time, which every API process sees, and on the day the price window ends
+_spy_returns_cache: Dict[str, Any] = {}
+
+
+def _load_spy_returns(db: Session, latest_spy_ingest: Optional[datetime]) -> Tuple[np.ndarray, np.ndarray]:
+    """Load the last year of SPY daily returns as (int64 day timestamps, returns), cached per SPY ingest."""
+    if latest_spy_ingest is None:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    
+    cache_key = (datetime.utcnow().date(), latest_spy_ingest)
+    if _spy_returns_cache.get("key") == cache_key:
+        return _spy_returns_cache["ts"], _spy_returns_cache["values"]
+    
+    # Core select returns plain tuples; no ORM objects or DataFrame on this numeric path
+    rows = db.execute(
+        select(
+            cast(AssetPrice.timestamp, Date),
+            cast(AssetPrice.close, Float)
+        ).where(
             AssetPrice.symbol == "SPY",
             AssetPrice.asset_type == "stock",
-            AssetPrice.timestamp >= datetime.utcnow() - timedelta(days=365)
-        ).order_by(AssetPrice.timestamp).all()
-        
-        if not spy_prices:
-            return 0.0
-        
-        spy_df = pd.DataFrame([
-            {
-                'date': price.timestamp,
-                'close': float(price.close)
-            }
-            for price in spy_prices
-        ])
-        spy_df.set_index('date', inplace=True)
-        spy_returns = spy_df['close'].pct_change().dropna()
-        
-        # Align dates
-        common_dates = portfolio_returns.index.intersection(spy_returns.index)
-        if len(common_dates) < 2:
-            return 0.0
-        
-        portfolio_aligned = portfolio_returns.loc[common_dates]
-        spy_aligned = spy_returns.loc[common_dates]
-        
-        # Calculate beta
-        covariance = np.cov(portfolio_aligned, spy_aligned)[0, 1]
-        spy_variance = np.var(spy_aligned)
-        
-        if spy_variance == 0 or np.isnan(covariance) or np.isnan(spy_variance):
-            return 0.0
-        
-        beta = covariance / spy_variance
-        return float(beta) if not np.isnan(beta) else 0.0
-        
+            AssetPrice.timestamp >= func.now() - PRICE_LOOKBACK
+        ).order_by(AssetPrice.timestamp)
+    ).all()
+    
+    if rows:
+        # Fill typed arrays straight from the row tuples, without intermediate column tuples
+        spy_ts = np.fromiter((row[0] for row in rows), dtype="datetime64[D]", count=len(rows))
+        spy_ts = spy_ts.astype("datetime64[ns]").view(np.int64)
+        spy_close = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        # One close per day; the last bar of a day wins
+        last_of_day = np.append(spy_ts[1:] != spy_ts[:-1], True)
+        spy_ts, spy_close = spy_ts[last_of_day], spy_close[last_of_day]
+        spy_ts, spy_returns = spy_ts[1:], spy_close[1:] / spy_close[:-1] - 1
+    else:
+        # Not cached, so SPY rows that land later are picked up on the next request
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    
+    # Cache plain arrays rather than ORM objects so no Session state is retained
+    _spy_returns_cache.update({
+        "key": cache_key,
+        "ts": spy_ts,
+        "values": spy_returns,
+    })
+    return spy_ts, spy_returns
+
+
+def _load_spy_returns_isolated(latest_spy_ingest: Optional[datetime]) -> Tuple[np.ndarray, np.ndarray]:
+    """Load SPY returns on a dedicated session so it can run off the event loop; empty on failure."""
+    try:
+        with get_db_session() as db:
+            return _load_spy_returns(db, latest_spy_ingest)
     except Exception:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+
+def invalidate_spy_returns_cache() -> None:
+    """Drop the cached SPY returns so the next beta calculation reloads them."""
+    _spy_returns_cache.clear()
+
+
+def _index_as_int64(index: pd.Index) -> np.ndarray:
+    """Nanosecond int64 view of a sorted DatetimeIndex, independent of its stored resolution."""
+    return np.asarray(index, dtype="datetime64[ns]").view(np.int64)
+
+
+def _beta_from_arrays(
+    portfolio_ts: np.ndarray,
+    portfolio_np: np.ndarray,
+    spy_ts: np.ndarray,
+    spy_np: np.ndarray
+) -> float:
+    """Calculate Beta vs SPY from sorted int64 timestamps and their returns."""
+    # Align dates on sorted int64 timestamps rather than pandas Index objects
+    common_ts, portfolio_idx, spy_idx = np.intersect1d(
+        portfolio_ts, spy_ts, assume_unique=True, return_indices=True
+    )
+    if common_ts.size < 2:
+        return 0.0
+    
+    portfolio_aligned = portfolio_np[portfolio_idx]
+    spy_aligned = spy_np[spy_idx]
+    
+    # Calculate beta = cov(p, s) / var(s) from centred dot products
+    spy_centred = spy_aligned - spy_aligned.mean()
+    spy_variance = spy_centred @ spy_centred
+    if spy_variance == 0 or np.isnan(spy_variance):
         return 0.0
+    
+    beta = (portfolio_aligned - portfolio_aligned.mean()) @ spy_centred / spy_variance
+    return float(beta) if not np.isnan(beta) else 0.0
+
+
+# Mock data has its own generator; _mc_rng is reserved for the locked Monte Carlo buffer
+_mock_rng = np.random.default_rng()
 
 
 def generate_mock_portfolio_data(assets: List[Asset]) -> Dict[str, pd.DataFrame]:
@@ -297,49 +648,139 @@ def generate_mock_portfolio_data(assets: List[Asset]) -> Dict[str, pd.DataFrame]
             daily_return_mean = 0.0005  # 0.05% daily mean return
             daily_return_std = 0.02     # 2% daily volatility
         
-        returns = np.random.normal(daily_return_mean, daily_return_std, 252)
-        prices = [base_price]
+        returns = _mock_rng.standard_normal(252) * daily_return_std + daily_return_mean
+        
+        # The first day is the base price; every later day compounds that day's return
+        growth = 1.0 + returns
+        growth[0] = 1.0
+        prices = base_price * np.cumprod(growth)
         
-        for ret in returns[1:]:
-            prices.append(prices[-1] * (1 + ret))
+        daily_returns = np.empty_like(prices)
+        daily_returns[0] = np.nan
+        daily_returns[1:] = prices[1:] / prices[:-1] - 1.0
         
-        df = pd.DataFrame({
-            'date': dates,
-            'close': prices
-        })
-        df.set_index('date', inplace=True)
-        df['returns'] = df['close'].pct_change().dropna()
+        df = pd.DataFrame({'close': prices, 'returns': daily_returns}, index=dates.rename('date'))
         portfolio_data[asset.symbol] = df
         
-        print(f"Generated mock data for {asset.symbol}: {len(df)} days, {len(df['returns'])} returns, base price: ${base_price:.2f}")
+        logger.debug(
+            "Generated mock data for %s: %d days, %d returns, base price: $%.2f",
+            asset.symbol, len(df), len(df['returns']), base_price
+        )
     
     return portfolio_data
 
 
-def run_monte_carlo_simulation(returns: pd.Series, num_simulations: int = 1000) -> Dict[str, Any]:
+def run_monte_carlo_simulation(returns: np.ndarray, num_simulations: int = 1000) -> Dict[str, Any]:
     """Run Monte Carlo simulation for portfolio returns."""
-    mean_return = returns.mean()
-    std_return = returns.std()
+    returns = _as_array(returns)
+    mean_return = float(returns.mean())
+    std_return = float(returns.std(ddof=1))
     
-    # Generate random returns
-    simulated_returns = np.random.normal(mean_return, std_return, (num_simulations, 252))  # 252 trading days
-    
-    # Calculate cumulative returns
-    cumulative_returns = np.cumprod(1 + simulated_returns, axis=1)
+    # Preallocated outputs: every final value, but only the sampled visualization paths
+    final_values = np.empty(num_simulations, dtype=np.float32)
+    sample_paths = np.empty(
+        (min(MC_NUM_PATHS, num_simulations), -(-MC_NUM_DAYS // MC_PATH_STRIDE)), dtype=np.float32
+    )
+    if cp is not None and num_simulations >= MC_GPU_MIN_SIMULATIONS:
+        simulate = _monte_carlo_cupy
+    elif _monte_carlo_kernel is not None:
+        simulate = _monte_carlo_kernel
+    else:
+        simulate = _monte_carlo_numpy
+    simulate(mean_return, std_return, MC_NUM_DAYS, MC_PATH_STRIDE, final_values, sample_paths)
     
-    # Calculate statistics
-    final_values = cumulative_returns[:, -1]
+    # One call partitions for both tails instead of sorting once per percentile
+    percentile_5, percentile_95 = np.percentile(final_values, [5, 95])
     
     return {
         "num_simulations": num_simulations,
-        "mean_final_value": float(np.mean(final_values)),
-        "std_final_value": float(np.std(final_values)),
-        "percentile_5": float(np.percentile(final_values, 5)),
-        "percentile_95": float(np.percentile(final_values, 95)),
-        "simulated_paths": cumulative_returns.tolist()[:100]  # Return first 100 paths for visualization
+        # float32 statistics carry ~7 significant digits; serialize only those
+        "mean_final_value": _significant(np.mean(final_values)),
+        "std_final_value": _significant(np.std(final_values)),
+        "percentile_5": _significant(percentile_5),
+        "percentile_95": _significant(percentile_95),
+        # First paths for visualization, every MC_PATH_STRIDE-th day rounded to 4 decimals;
+        # round in float64 so tolist() yields short floats rather than widened float32 noise
+        "simulated_paths": sample_paths.astype(np.float64).round(4).tolist()
     }
 
 
+def _significant(value: float, digits: int = 6) -> float:
+    """Round to significant digits so float32-derived values serialize without widening noise."""
+    return float(f"{float(value):.{digits}g}")
+
+
+# Shared generator and scratch buffer for the NumPy Monte Carlo path, reused across calls.
+# Simulations beyond the visualization paths are drawn MC_CHUNK_ROWS at a time so the
+# buffer stays cache-sized regardless of num_simulations.
+MC_CHUNK_ROWS = 128
+_mc_rng = np.random.default_rng()
+_mc_buffer = np.empty((max(MC_NUM_PATHS, MC_CHUNK_ROWS), MC_NUM_DAYS), dtype=np.float32)
+_mc_lock = threading.Lock()
+
+
+def _draw_growth_factors(out: np.ndarray, mean: float, std: float) -> None:
+    """Fill out with daily growth factors 1 + N(mean, std), in place in float32."""
+    _mc_rng.standard_normal(dtype=np.float32, out=out)
+    out *= np.float32(std)
+    out += np.float32(1.0 + mean)
+
+
+def _monte_carlo_numpy(
+    mean: float, std: float, num_days: int, path_stride: int, finals_out: np.ndarray, paths_out: np.ndarray
+) -> None:
+    """Simulate return paths with NumPy, filling final values and sampled visualization paths."""
+    global _mc_buffer
+    num_simulations = finals_out.shape[0]
+    num_paths = paths_out.shape[0]
+    with _mc_lock:
+        rows = max(num_paths, MC_CHUNK_ROWS)
+        if _mc_buffer.shape[0] < rows or _mc_buffer.shape[1] != num_days:
+            _mc_buffer = np.empty((rows, num_days), dtype=np.float32)
+        
+        # Phase 1: full cumulative paths only for the simulations that are visualized
+        paths = _mc_buffer[:num_paths]
+        _draw_growth_factors(paths, mean, std)
+        np.cumprod(paths, axis=1, out=paths)
+        paths_out[:] = paths[:, ::path_stride]
+        finals_out[:num_paths] = paths[:, -1]
+        
+        # Phase 2: the remaining simulations only need their final value
+        for start in range(num_paths, num_simulations, MC_CHUNK_ROWS):
+            stop = min(start + MC_CHUNK_ROWS, num_simulations)
+            chunk = _mc_buffer[:stop - start]
+            _draw_growth_factors(chunk, mean, std)
+            np.prod(chunk, axis=1, out=finals_out[start:stop])
+
+
+def _monte_carlo_cupy(
+    mean: float, std: float, num_days: int, path_stride: int, finals_out: np.ndarray, paths_out: np.ndarray
+) -> None:
+    """Simulate return paths on the GPU, copying back only final values and sampled paths."""
+    paths = cp.random.standard_normal((finals_out.shape[0], num_days), dtype=cp.float32)
+    paths *= std
+    paths += 1.0 + mean
+    cp.cumprod(paths, axis=1, out=paths)
+    finals_out[:] = cp.asnumpy(paths[:, -1])
+    paths_out[:] = cp.asnumpy(paths[:paths_out.shape[0], ::path_stride])
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _monte_carlo_kernel(mean, std, num_days, path_stride, finals_out, paths_out):
+        """Simulate return paths in parallel, one path per iteration with a running product."""
+        num_paths = paths_out.shape[0]
+        for i in prange(finals_out.shape[0]):
+            value = 1.0
+            for t in range(num_days):
+                value *= 1.0 + np.random.normal(mean, std)
+                if i < num_paths and t % path_stride == 0:
+                    paths_out[i, t // path_stride] = value
+            finals_out[i] = value
+else:
+    _monte_carlo_kernel = None
+
+
 @router.get("/metrics/{portfolio_id}", response_model=List[RiskMetrics])
 async def get_risk_metrics(
     portfolio_id: uuid.UUID,
@@ -395,51 +836,28 @@ async def get_correlation_matrix(
                 "assets": len(assets)
             }
         
-        # Get price data for all assets
-        returns_data = {}
-        for asset in assets:
-            prices = db.query(AssetPrice).filter(
-                AssetPrice.symbol == asset.symbol,
-                AssetPrice.asset_type == asset.asset_type,
-                AssetPrice.timestamp >= datetime.utcnow() - timedelta(days=365)
-            ).order_by(AssetPrice.timestamp).all()
-            
-            if prices:
-                df = pd.DataFrame([
-                    {
-                        'date': price.timestamp,
-                        'close': float(price.close)
-                    }
-                    for price in prices
-                ])
-                df.set_index('date', inplace=True)
-                returns = df['close'].pct_change().dropna()
-                returns_data[asset.symbol] = returns
-        
-        if len(returns_data) < 2:
+        # Get daily returns for all assets in one query; keep assets that have returns
+        returns_df = _load_returns(db, assets).dropna(axis=1, how='all')
+        
+        if returns_df.shape[1] < 2:
             return {
                 "message": "Insufficient price data for correlation analysis",
-                "assets_with_data": len(returns_data)
+                "assets_with_data": returns_df.shape[1]
             }
         
-        # Create returns DataFrame
-        returns_df = pd.DataFrame(returns_data)
+        # Keep only days on which every asset has a return
         returns_df = returns_df.dropna()
         
         # Calculate correlation matrix
         correlation_matrix = returns_df.corr()
         
-        # Convert to serializable format
-        correlation_data = {}
-        for symbol1 in correlation_matrix.columns:
-            correlation_data[symbol1] = {}
-            for symbol2 in correlation_matrix.columns:
-                correlation_data[symbol1][symbol2] = float(correlation_matrix.loc[symbol1, symbol2])
+        # Convert to serializable format; the matrix is symmetric, so column-keyed is row-keyed
+        correlation_data = correlation_matrix.to_dict()
         
-        # Calculate diversification metrics
-        avg_correlation = correlation_matrix.values[np.triu_indices_from(correlation_matrix.values, k=1)].mean()
-        max_correlation = correlation_matrix.values[np.triu_indices_from(correlation_matrix.values, k=1)].max()
-        min_correlation = correlation_matrix.values[np.triu_indices_from(correlation_matrix.values, k=1)].min()
+        # Calculate diversification metrics over the upper triangle, gathered once
+        correlation_values = correlation_matrix.to_numpy()
+        upper = correlation_values[_upper_triangle_indices(correlation_values.shape[0])]
+        avg_correlation, max_correlation, min_correlation = upper.mean(), upper.max(), upper.min()
         
         return {
             "correlation_matrix": correlation_data,
@@ -449,7 +867,7 @@ async def get_correlation_matrix(
                 "minimum_correlation": float(min_correlation),
                 "diversification_score": float(1 - avg_correlation)  # Higher is better
             },
-            "assets": list(returns_data.keys()),
+            "assets": list(returns_df.columns),
             "data_points": len(returns_df),
             "calculated_at": datetime.utcnow().isoformat()
         }
@@ -461,6 +879,26 @@ async def get_correlation_matrix(
         )
 
 
+@lru_cache(maxsize=32)
+def _upper_triangle_indices(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Strict upper-triangle indices of an n x n matrix, shared read-only between calls."""
+    rows, cols = np.triu_indices(n, k=1)
+    rows.setflags(write=False)
+    cols.setflags(write=False)
+    return rows, cols
+
+
+# Stress scenarios as (name, description, shock)
+STRESS_SCENARIOS = (
+    ("market_crash", "30% market decline scenario", -0.30),
+    ("black_monday", "22% single-day decline (Black Monday 1987)", -0.22),
+    ("dot_com_crash", "78% decline over 2 years (2000-2002)", -0.78),
+    ("financial_crisis", "57% decline (2007-2009)", -0.57),
+    ("covid_crash", "34% decline in 1 month (March 2020)", -0.34),
+)
+_STRESS_SHOCKS = np.array([shock for _, _, shock in STRESS_SCENARIOS])
+
+
 @router.get("/stress-test/{portfolio_id}")
 async def portfolio_stress_test(
     portfolio_id: uuid.UUID,
@@ -484,77 +922,45 @@ async def portfolio_stress_test(
         # Get portfolio assets and their price data
         assets = db.query(Asset).filter(Asset.portfolio_id == portfolio_id).all()
         
-        portfolio_data = {}
-        for asset in assets:
-            prices = db.query(AssetPrice).filter(
-                AssetPrice.symbol == asset.symbol,
-                AssetPrice.asset_type == asset.asset_type,
-                AssetPrice.timestamp >= datetime.utcnow() - timedelta(days=365)
-            ).order_by(AssetPrice.timestamp).all()
+        # Reuse today's stored portfolio returns while nothing they depend on has changed
+        changed_at = _inputs_changed_at(db, portfolio, assets)
+        portfolio_returns = _cached_portfolio_returns(db, portfolio.id, changed_at)
+        if portfolio_returns is None:
+            # Get price data for all assets in one query
+            closes = _read_close_matrix(db, [(asset.symbol, asset.asset_type) for asset in assets])
             
-            if prices:
-                df = pd.DataFrame([
-                    {
-                        'date': price.timestamp,
-                        'close': float(price.close)
-                    }
-                    for price in prices
-                ])
-                df.set_index('date', inplace=True)
-                returns = df['close'].pct_change().dropna()
-                portfolio_data[asset.symbol] = returns
-        
-        if not portfolio_data:
-            return {"message": "No price data available for stress testing"}
-        
-        # Calculate portfolio returns (equal weight)
-        returns_df = pd.DataFrame(portfolio_data)
-        portfolio_returns = returns_df.mean(axis=1).dropna()
-        
-        # Define stress scenarios
-        scenarios = {
-            "market_crash": {
-                "description": "30% market decline scenario",
-                "shock": -0.30
-            },
-            "black_monday": {
-                "description": "22% single-day decline (Black Monday 1987)",
-                "shock": -0.22
-            },
-            "dot_com_crash": {
-                "description": "78% decline over 2 years (2000-2002)",
-                "shock": -0.78
-            },
-            "financial_crisis": {
-                "description": "57% decline (2007-2009)",
-                "shock": -0.57
-            },
-            "covid_crash": {
-                "description": "34% decline in 1 month (March 2020)",
-                "shock": -0.34
-            }
-        }
+            if closes.empty:
+                return {"message": "No price data available for stress testing"}
+            
+            # Calculate portfolio returns (equal weight)
+            portfolio_returns = _portfolio_returns(closes)
+            _store_portfolio_returns(db, portfolio.id, portfolio_returns)
         
-        stress_results = {}
         current_value = 100000  # Assume $100k portfolio
         
-        for scenario_name, scenario in scenarios.items():
-            shocked_value = current_value * (1 + scenario["shock"])
-            loss_amount = current_value - shocked_value
-            
-            stress_results[scenario_name] = {
-                "description": scenario["description"],
-                "shock_percentage": scenario["shock"] * 100,
+        # Value, loss and recovery for every scenario in one array operation each
+        values_after = current_value * (1 + _STRESS_SHOCKS)
+        losses = current_value - values_after
+        recovery_days = estimate_recovery_time(portfolio_returns, np.abs(_STRESS_SHOCKS))
+        
+        stress_results = {
+            name: {
+                "description": description,
+                "shock_percentage": shock * 100,
                 "portfolio_value_before": current_value,
-                "portfolio_value_after": shocked_value,
-                "absolute_loss": loss_amount,
-                "time_to_recover_days": estimate_recovery_time(portfolio_returns, abs(scenario["shock"]))
+                "portfolio_value_after": value_after,
+                "absolute_loss": loss,
+                "time_to_recover_days": days
             }
+            for (name, description, shock), value_after, loss, days in zip(
+                STRESS_SCENARIOS, values_after.tolist(), losses.tolist(), recovery_days.tolist()
+            )
+        }
         
         # Calculate portfolio resilience metrics
         resilience_metrics = {
-            "worst_case_scenario": min(scenarios.values(), key=lambda x: x["shock"])["shock"] * 100,
-            "average_scenario_loss": np.mean([s["shock"] for s in scenarios.values()]) * 100,
+            "worst_case_scenario": float(_STRESS_SHOCKS.min()) * 100,
+            "average_scenario_loss": float(_STRESS_SHOCKS.mean()) * 100,
             "portfolio_volatility": float(portfolio_returns.std() * np.sqrt(252) * 100),  # Annualized %
             "maximum_daily_loss": float(portfolio_returns.min() * 100)
         }
@@ -573,18 +979,18 @@ async def portfolio_stress_test(
         )
 
 
-def estimate_recovery_time(returns: pd.Series, loss_percentage: float) -> int:
-    """Estimate recovery time based on historical returns."""
+def estimate_recovery_time(returns: pd.Series, loss_percentages: np.ndarray) -> np.ndarray:
+    """Estimate recovery time in days for each loss based on historical returns."""
     if len(returns) == 0:
-        return 0
+        return np.zeros(len(loss_percentages), dtype=np.int64)
     
     avg_daily_return = returns.mean()
     if avg_daily_return <= 0:
-        return 9999  # Very long recovery
+        return np.full(len(loss_percentages), 9999, dtype=np.int64)  # Very long recovery
     
-    # Calculate days needed to recover the loss
-    recovery_days = int(np.log(1 / (1 - loss_percentage)) / avg_daily_return)
-    return min(recovery_days, 9999)
+    # Calculate days needed to recover each loss
+    recovery_days = (np.log(1 / (1 - loss_percentages)) / avg_daily_return).astype(np.int64)
+    return np.minimum(recovery_days, 9999)
 
 
 def generate_stress_recommendation(stress_results: dict, resilience_metrics: dict) -> str:
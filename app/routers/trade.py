@@ -1,14 +1,17 @@
 """Paper trading endpoints for Alpaca and Binance."""
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.auth import get_current_user
 from app.schemas import PaperTradeRequest, PaperTrade
 from app.models import PaperTrade as PaperTradeModel, Portfolio
 from datetime import datetime
+import asyncio
+import time
 import uuid
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
@@ -30,6 +33,33 @@ binance_client = BinanceClient(
     testnet=True
 )
 
+# Recent quotes per (symbol, asset_type) so a burst of trades shares one price fetch.
+# Keys are user-supplied symbols, so the cache is bounded and locks live only while a fetch runs.
+PRICE_CACHE_TTL = 5  # seconds
+PRICE_CACHE_MAX_ENTRIES = 1024
+_price_cache: Dict[Tuple[str, str], Dict[str, float]] = {}
+_price_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+
+def _cached_price(key: Tuple[str, str]) -> Optional[float]:
+    """Return the cached quote for key if it is younger than PRICE_CACHE_TTL seconds."""
+    entry = _price_cache.get(key)
+    if entry is not None and time.monotonic() - entry["ts"] < PRICE_CACHE_TTL:
+        return entry["price"]
+    return None
+
+
+def _cache_price(key: Tuple[str, str], price: float) -> None:
+    """Cache a live quote, making room by dropping expired entries or, failing that, everything."""
+    if key not in _price_cache and len(_price_cache) >= PRICE_CACHE_MAX_ENTRIES:
+        now = time.monotonic()
+        for cached_key, entry in list(_price_cache.items()):
+            if now - entry["ts"] >= PRICE_CACHE_TTL:
+                del _price_cache[cached_key]
+        if len(_price_cache) >= PRICE_CACHE_MAX_ENTRIES:
+            _price_cache.clear()
+    _price_cache[key] = {"ts": time.monotonic(), "price": price}
+
 
 @router.post("/paper", response_model=PaperTrade)
 async def execute_paper_trade(
@@ -115,7 +145,31 @@ async def execute_paper_trade(
 
 
 async def _get_current_price(symbol: str, asset_type: str) -> float:
-    """Get current price for a symbol."""
+    """Get current price for a symbol, reusing a quote fetched in the last few seconds."""
+    key = (symbol.upper(), asset_type)
+    price = _cached_price(key)
+    if price is not None:
+        return price
+    
+    lock = _price_locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            # Another request may have fetched the quote while this one waited
+            price = _cached_price(key)
+            if price is None:
+                price, is_live = await _fetch_current_price(symbol, asset_type)
+                # Mock fallback prices (e.g. unknown symbols) are never cached
+                if is_live:
+                    _cache_price(key, price)
+            return price
+    finally:
+        # Waiters keep their own reference to the lock; later requests hit the cache or start fresh
+        if _price_locks.get(key) is lock:
+            del _price_locks[key]
+
+
+async def _fetch_current_price(symbol: str, asset_type: str) -> Tuple[float, bool]:
+    """Fetch current price for a symbol, with whether it is a live quote rather than a mock fallback."""
     try:
         print(f"Getting current price for {symbol} ({asset_type})")
         
@@ -135,7 +189,7 @@ async def _get_current_price(symbol: str, asset_type: str) -> float:
                 if data and 'data_preview' in data:
                     price = data['data_preview']['last_price']
                     print(f"Got real stock price for {symbol}: {price}")
-                    return float(price)
+                    return float(price), True
             except Exception as e:
                 print(f"Failed to get real stock data for {symbol}: {e}")
             
@@ -143,7 +197,7 @@ async def _get_current_price(symbol: str, asset_type: str) -> float:
             import random
             mock_price = round(random.uniform(50, 200), 2)
             print(f"Using mock stock price for {symbol}: {mock_price}")
-            return mock_price
+            return mock_price, False
             
         elif asset_type == "crypto":
             try:
@@ -157,7 +211,7 @@ async def _get_current_price(symbol: str, asset_type: str) -> float:
                 if data and 'data_preview' in data:
                     price = data['data_preview']['last_price']
                     print(f"Got real crypto price for {symbol}: {price}")
-                    return float(price)
+                    return float(price), True
             except Exception as e:
                 print(f"Failed to get real crypto data for {symbol}: {e}")
             
@@ -165,7 +219,7 @@ async def _get_current_price(symbol: str, asset_type: str) -> float:
             import random
             mock_price = round(random.uniform(0.1, 100), 4)
             print(f"Using mock crypto price for {symbol}: {mock_price}")
-            return mock_price
+            return mock_price, False
         else:
             raise ValueError(f"Unsupported asset type: {asset_type}")
     except Exception as e:
@@ -192,8 +246,8 @@ async def _execute_alpaca_trade(paper_trade: PaperTradeModel, request: PaperTrad
             time_in_force=TimeInForce.GTC
         )
         
-        # Submit order
-        order = alpaca_client.submit_order(order_data=market_order_data)
+        # Submit order off the event loop; the SDK call is blocking HTTP
+        order = await asyncio.to_thread(alpaca_client.submit_order, order_data=market_order_data)
         
         # Update paper trade with order ID
         paper_trade.status = f"executed_alpaca_{order.id}"
@@ -212,8 +266,9 @@ async def _execute_binance_trade(paper_trade: PaperTradeModel, request: PaperTra
         # Convert side
         side = "BUY" if request.side == "buy" else "SELL"
         
-        # Create order
-        order = binance_client.create_order(
+        # Create order off the event loop; the SDK call is blocking HTTP
+        order = await asyncio.to_thread(
+            binance_client.create_order,
             symbol=request.symbol.upper() + "USDT",
             side=side,
             type="MARKET",
@@ -271,38 +326,35 @@ async def get_positions(
     db: Session = Depends(get_db)
 ):
     """Get current positions across all portfolios."""
-    # This is a simplified version - in production you'd track positions more carefully
-    trades = db.query(PaperTradeModel).filter(
+    # This is a simplified version - in production you'd track positions more carefully.
+    # Net quantity and cost per (symbol, asset_type) are summed by Postgres: buys add, sells subtract
+    signed = case((PaperTradeModel.side == "buy", 1), else_=-1)
+    net_quantity = func.sum(signed * PaperTradeModel.quantity)
+    rows = db.query(
+        PaperTradeModel.symbol,
+        PaperTradeModel.asset_type,
+        net_quantity.label("quantity"),
+        func.sum(signed * PaperTradeModel.total_value).label("total_cost")
+    ).filter(
         PaperTradeModel.user_id == current_user["user_id"],
         PaperTradeModel.status.like("executed%")
-    ).all()
-    
-    positions = {}
-    for trade in trades:
-        key = f"{trade.symbol}_{trade.asset_type}"
-        if key not in positions:
-            positions[key] = {
-                "symbol": trade.symbol,
-                "asset_type": trade.asset_type,
-                "quantity": 0,
-                "total_cost": 0,
-                "average_price": 0
-            }
-        
-        if trade.side == "buy":
-            positions[key]["quantity"] += float(trade.quantity)
-            positions[key]["total_cost"] += float(trade.total_value)
-        else:
-            positions[key]["quantity"] -= float(trade.quantity)
-            positions[key]["total_cost"] -= float(trade.total_value)
-        
-        if positions[key]["quantity"] > 0:
-            positions[key]["average_price"] = positions[key]["total_cost"] / positions[key]["quantity"]
+    ).group_by(
+        PaperTradeModel.symbol,
+        PaperTradeModel.asset_type
+    ).having(net_quantity > 0).all()  # Filter out zero or negative positions
     
-    # Filter out zero or negative positions
-    active_positions = {k: v for k, v in positions.items() if v["quantity"] > 0}
+    active_positions = [
+        {
+            "symbol": row.symbol,
+            "asset_type": row.asset_type,
+            "quantity": float(row.quantity),
+            "total_cost": float(row.total_cost),
+            "average_price": float(row.total_cost) / float(row.quantity)
+        }
+        for row in rows
+    ]
     
     return {
-        "positions": list(active_positions.values()),
+        "positions": active_positions,
         "total_positions": len(active_positions)
     }
@@ -5,6 +5,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
+from app import __version__
 
 
 # Base schemas
@@ -208,5 +209,5 @@ class DataFetchRequest(BaseModel):
 class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
-    version: str = "1.0.0"
+    version: str = __version__
 
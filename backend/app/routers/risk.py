@@ -191,10 +191,9 @@ def calculate_max_drawdown(returns: pd.Series) -> float:
     """Calculate maximum drawdown."""
     if len(returns) < 2:
         return 0.0
-    cumulative = (1 + returns).cumprod()
-    running_max = cumulative.expanding().max()
-    drawdown = (cumulative - running_max) / running_max
-    max_dd = drawdown.min()
+    cumulative = np.cumprod(1.0 + np.asarray(returns, dtype=np.float64))
+    running_max = np.maximum.accumulate(cumulative)
+    max_dd = (cumulative / running_max - 1.0).min()
     return float(max_dd) if not np.isnan(max_dd) else 0.0
 
 
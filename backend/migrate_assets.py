@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
-Migration script to add quantity and purchase_price columns to assets table.
+Migration script to add quantity and purchase_price columns to assets table,
+the portfolio_returns_cache table and the composite price lookup index used
+by the risk endpoints.
 This script uses the existing backend configuration.
 """
 
@@ -16,7 +18,7 @@ from app.config import settings
 from app.database import construct_database_url
 
 def run_migration():
-    """Add quantity and purchase_price columns to assets table."""
+    """Add assets columns, the portfolio returns cache table and the asset_prices lookup index."""
     try:
         # Use the existing database URL construction
         database_url = construct_database_url()
@@ -30,7 +32,10 @@ def run_migration():
             trans = conn.begin()
             
             try:
-                # Add quantity column
+                # Fail fast instead of queueing writers behind the ACCESS EXCLUSIVE lock
+                conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+                
+                # Add quantity column; NOT NULL DEFAULT fills existing rows, so no backfill is needed
                 print("Adding quantity column to assets table...")
                 conn.execute(text("""
                     ALTER TABLE assets 
@@ -44,25 +49,21 @@ def run_migration():
                     ADD COLUMN IF NOT EXISTS purchase_price NUMERIC(20,8) NOT NULL DEFAULT 0
                 """))
                 
-                # Update existing assets to have default values
-                print("Updating existing assets with default values...")
+                # Stored daily portfolio returns reused by the risk endpoints
+                print("Creating portfolio_returns_cache table...")
                 conn.execute(text("""
-                    UPDATE assets 
-                    SET quantity = 1 
-                    WHERE quantity IS NULL
-                """))
-                
-                conn.execute(text("""
-                    UPDATE assets 
-                    SET purchase_price = 0 
-                    WHERE purchase_price IS NULL
+                    CREATE TABLE IF NOT EXISTS portfolio_returns_cache (
+                        portfolio_id UUID PRIMARY KEY REFERENCES portfolios(id) ON DELETE CASCADE,
+                        dates JSONB NOT NULL,
+                        returns JSONB NOT NULL,
+                        computed_at TIMESTAMP WITH TIME ZONE NOT NULL
+                    )
                 """))
                 
                 # Commit the transaction
                 trans.commit()
                 print("✅ Migration completed successfully!")
-                print("Added quantity and purchase_price columns to assets table.")
-                print("Updated existing assets with default values.")
+                print("Added quantity and purchase_price columns to assets table and the portfolio_returns_cache table.")
                 
             except SQLAlchemyError as e:
                 # Rollback on error
@@ -70,6 +71,15 @@ def run_migration():
                 print(f"❌ Migration failed: {e}")
                 raise
                 
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            print("Adding (symbol, asset_type, timestamp) index to asset_prices table...")
+            conn.execute(text("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_asset_prices_symbol_type_timestamp
+                ON asset_prices (symbol, asset_type, timestamp)
+            """))
+            print("✅ Index is in place.")
+                
     except Exception as e:
         print(f"❌ Error running migration: {e}")
         sys.exit(1)
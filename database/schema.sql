@@ -107,8 +107,17 @@ CREATE TABLE IF NOT EXISTS risk_metrics (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Portfolio returns cache table (equal-weight daily returns reused by risk endpoints)
+CREATE TABLE IF NOT EXISTS portfolio_returns_cache (
+    portfolio_id UUID PRIMARY KEY REFERENCES portfolios(id) ON DELETE CASCADE,
+    dates JSONB NOT NULL,
+    returns JSONB NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_asset_prices_symbol_timestamp ON asset_prices(symbol, timestamp);
+CREATE INDEX IF NOT EXISTS idx_asset_prices_symbol_type_timestamp ON asset_prices(symbol, asset_type, timestamp);
 CREATE INDEX IF NOT EXISTS idx_asset_prices_asset_type ON asset_prices(asset_type);
 CREATE INDEX IF NOT EXISTS idx_portfolios_user_id ON portfolios(user_id);
 CREATE INDEX IF NOT EXISTS idx_assets_portfolio_id ON assets(portfolio_id);